@@ -3,22 +3,25 @@ DocuMind AI — API Routes (FastAPI)
 
 Endpoints: /upload, /ask, /documents, /evaluate, /analytics, /feedback
 """
-import json
+import asyncio
 import time
 from datetime import datetime, timezone, timedelta
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from loguru import logger
 
 from app.config import settings
-from app.models.database import Document, QueryLog, get_db
+from app.models.database import Document, QueryLog, SessionLocal, get_db
 from app.models.schemas import (
     DocumentUploadResponse, DocumentInfo, AskRequest, AskResponse,
     SourceChunk, EvalRequest, EvalResponse, AnalyticsResponse,
     FeedbackRequest,
 )
+from app.services.cache import get_semantic_cache
+from app.services.embedding import get_embedding_service
 from app.services.ingestion import IngestionService
 from app.services.retrieval import get_retrieval_service
 from app.services.llm import get_llm_service
@@ -46,37 +49,38 @@ async def upload_document(
     """
     ingestion = IngestionService()
 
-    # Validate file
-    content = await file.read()
-    is_valid, msg = ingestion.validate_file(file.filename, len(content))
+    # Validate file type (size is enforced while streaming)
+    is_valid, msg = ingestion.validate_file(file.filename, 0)
     if not is_valid:
         raise HTTPException(status_code=400, detail=msg)
 
-    # Save file
-    filepath = await ingestion.save_uploaded_file(file.filename, content)
+    # Stream file to disk in 1 MB chunks — never holds the full upload in RAM
+    try:
+        filepath, file_size = await ingestion.save_upload_stream(file.filename, file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Extract text
+    # Extract + chunk in one streamed pass (off the event loop — CPU-bound)
     try:
-        text, num_pages = ingestion.extract_text(filepath)
+        chunks, num_pages = await asyncio.to_thread(
+            ingestion.extract_and_chunk, filepath, file.filename
+        )
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Failed to parse file: {str(e)}")
 
-    if not text.strip():
+    if not chunks:
         raise HTTPException(status_code=422, detail="No text could be extracted from this file.")
 
-    # Chunk the text
-    chunks = ingestion.chunk_text(text, file.filename, num_pages)
-
-    # Index chunks into vector store
+    # Index chunks into vector store (embedding is the heavy stage)
     retrieval = get_retrieval_service()
-    num_indexed = retrieval.index_chunks(chunks, DEFAULT_COLLECTION)
+    num_indexed = await asyncio.to_thread(retrieval.index_chunks, chunks, DEFAULT_COLLECTION)
 
     # Save document record to database
     ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else "unknown"
     doc = Document(
         filename=file.filename,
         file_type=ext,
-        file_size=len(content),
+        file_size=file_size,
         num_chunks=num_indexed,
         num_pages=num_pages,
         status="ready",
@@ -86,6 +90,9 @@ async def upload_document(
     db.commit()
     db.refresh(doc)
 
+    # Corpus changed — cached answers may be stale
+    get_semantic_cache().clear()
+
     logger.info(f"Document uploaded: {file.filename} → {num_indexed} chunks")
 
     return DocumentUploadResponse(
@@ -104,9 +111,21 @@ async def upload_document(
 # ASK QUESTIONS
 # ═══════════════════════════════════════════════
 
+def _persist_query_log(**fields):
+    """Write a QueryLog row from a background task (own short session)."""
+    session = SessionLocal()
+    try:
+        session.add(QueryLog(**fields))
+        session.commit()
+    finally:
+        session.close()
+    _invalidate_analytics_cache()
+
+
 @router.post("/ask", response_model=AskResponse, tags=["Chat"])
 async def ask_question(
     request: AskRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """
@@ -124,6 +143,17 @@ async def ask_question(
             detail=f"Input rejected by safety filter: {', '.join(input_flags)}"
         )
 
+    # Semantic cache: near-duplicate questions skip retrieval + LLM entirely
+    query_embedding = await asyncio.to_thread(
+        get_embedding_service().embed_text, request.question
+    )
+    cache = get_semantic_cache()
+    cached = cache.get(query_embedding, document_id=request.document_id)
+    if cached is not None:
+        return cached.model_copy(
+            update={"latency_ms": round((time.time() - start_time) * 1000, 1)}
+        )
+
     # Determine document filter
     doc_filter = None
     if request.document_id:
@@ -131,13 +161,15 @@ async def ask_question(
         if doc:
             doc_filter = doc.filename
 
-    # Retrieve relevant chunks
+    # Retrieve relevant chunks (embedding + ANN search block, so thread it)
     retrieval = get_retrieval_service()
-    search_results = retrieval.search(
+    search_results = await asyncio.to_thread(
+        retrieval.search,
         query=request.question,
         collection_name=DEFAULT_COLLECTION,
         top_k=request.top_k,
         document_filter=doc_filter,
+        query_embedding=query_embedding,
     )
 
     if not search_results:
@@ -161,9 +193,9 @@ async def ask_question(
         for r in search_results
     ]
 
-    # Generate answer via Groq
+    # Generate answer via Groq (async client — awaits on the pooled socket)
     llm = get_llm_service()
-    llm_result = llm.generate_answer(request.question, context_chunks)
+    llm_result = await llm.generate_answer(request.question, context_chunks)
 
     # Output guardrails
     cleaned_answer, output_flags = guardrails.check_output(
@@ -187,21 +219,19 @@ async def ask_question(
         for r in search_results
     ]
 
-    # Log query
-    query_log = QueryLog(
+    # Log query after the response ships — the fsync stays off the hot path
+    background_tasks.add_task(
+        _persist_query_log,
         question=request.question,
         answer=cleaned_answer,
-        sources=json.dumps([s.model_dump() for s in sources[:3]]),
+        sources=orjson.dumps([s.model_dump() for s in sources[:3]]).decode(),
         retrieval_score=round(avg_score, 4),
         latency_ms=latency_ms,
         tokens_used=llm_result["tokens_used"],
         document_id=request.document_id,
     )
-    db.add(query_log)
-    db.commit()
-    db.refresh(query_log)
 
-    return AskResponse(
+    response = AskResponse(
         answer=cleaned_answer,
         sources=sources,
         confidence=round(min(1.0, avg_score), 4),
@@ -209,6 +239,11 @@ async def ask_question(
         latency_ms=latency_ms,
         guardrail_flags=input_flags + output_flags,
     )
+    # Only real generations are cached — a transient Groq failure must
+    # not serve its error message for the whole TTL
+    if not llm_result["error"]:
+        cache.put(query_embedding, response, document_id=request.document_id)
+    return response
 
 
 # ═══════════════════════════════════════════════
@@ -218,8 +253,23 @@ async def ask_question(
 @router.get("/documents", response_model=list[DocumentInfo], tags=["Documents"])
 async def list_documents(db: Session = Depends(get_db)):
     """List all uploaded documents."""
-    docs = db.query(Document).order_by(Document.upload_time.desc()).all()
-    return docs
+    # Project only the columns DocumentInfo needs — skips full ORM
+    # hydration (identity map + relationship setup) per row
+    rows = (
+        db.query(
+            Document.id,
+            Document.filename,
+            Document.file_type,
+            Document.file_size,
+            Document.num_chunks,
+            Document.num_pages,
+            Document.status,
+            Document.upload_time,
+        )
+        .order_by(Document.upload_time.desc())
+        .all()
+    )
+    return [DocumentInfo.model_construct(**row._asdict()) for row in rows]
 
 
 @router.delete("/documents/{doc_id}", tags=["Documents"])
@@ -230,6 +280,7 @@ async def delete_document(doc_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Document not found")
     db.delete(doc)
     db.commit()
+    get_semantic_cache().clear()
     return {"message": f"Document '{doc.filename}' deleted", "id": doc_id}
 
 
@@ -247,11 +298,12 @@ async def run_evaluation(
     Measures retrieval accuracy, answer faithfulness, and latency.
     """
     eval_service = get_evaluation_service()
-    result = eval_service.run_evaluation(
+    result = await eval_service.run_evaluation(
         test_name=request.test_name,
         questions=request.questions,
         collection_name=DEFAULT_COLLECTION,
         db=db,
+        refresh_cache=request.refresh_cache,
     )
     return EvalResponse(**result)
 
@@ -267,25 +319,49 @@ async def evaluation_history(db: Session = Depends(get_db)):
 # ANALYTICS
 # ═══════════════════════════════════════════════
 
+# Short-TTL cache: the dashboard polls, but the aggregates only change
+# when new queries/feedback land (which reset "at" to force a refresh)
+_ANALYTICS_TTL_SECONDS = 30
+_analytics_cache = {"at": 0.0, "payload": None}
+
+
+def _invalidate_analytics_cache():
+    _analytics_cache["at"] = 0.0
+
+
 @router.get("/analytics", response_model=AnalyticsResponse, tags=["Analytics"])
 async def get_analytics(db: Session = Depends(get_db)):
     """Get usage analytics and statistics."""
-    # Total counts
-    total_docs = db.query(Document).count()
-    total_queries = db.query(QueryLog).count()
-    total_chunks = db.query(func.sum(Document.num_chunks)).scalar() or 0
-
-    # Averages
-    avg_latency = db.query(func.avg(QueryLog.latency_ms)).scalar() or 0.0
-    avg_retrieval = db.query(func.avg(QueryLog.retrieval_score)).scalar() or 0.0
+    if (
+        _analytics_cache["payload"] is not None
+        and time.time() - _analytics_cache["at"] < _ANALYTICS_TTL_SECONDS
+    ):
+        return _analytics_cache["payload"]
+
+    # Document stats (one query)
+    total_docs, total_chunks = db.query(
+        func.count(Document.id),
+        func.coalesce(func.sum(Document.num_chunks), 0),
+    ).one()
 
-    # Today's queries
     today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    queries_today = db.query(QueryLog).filter(QueryLog.timestamp >= today).count()
 
-    # Feedback counts
-    thumbs_up = db.query(QueryLog).filter(QueryLog.feedback == "thumbs_up").count()
-    thumbs_down = db.query(QueryLog).filter(QueryLog.feedback == "thumbs_down").count()
+    # Query-log scalars folded into a single SELECT with conditional aggregates
+    (
+        total_queries,
+        avg_latency,
+        avg_retrieval,
+        queries_today,
+        thumbs_up,
+        thumbs_down,
+    ) = db.query(
+        func.count(QueryLog.id),
+        func.coalesce(func.avg(QueryLog.latency_ms), 0.0),
+        func.coalesce(func.avg(QueryLog.retrieval_score), 0.0),
+        func.coalesce(func.sum(case((QueryLog.timestamp >= today, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((QueryLog.feedback == "thumbs_up", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((QueryLog.feedback == "thumbs_down", 1), else_=0)), 0),
+    ).one()
 
     # Top 5 most asked questions (by similarity — simplified as exact match)
     top_questions_raw = (
@@ -297,22 +373,24 @@ async def get_analytics(db: Session = Depends(get_db)):
     )
     top_questions = [{"question": q, "count": c} for q, c in top_questions_raw]
 
-    # Queries per day (last 7 days)
+    # Queries per day (last 7 days) via a single GROUP BY DATE(timestamp)
+    week_ago = today - timedelta(days=6)
+    per_day = dict(
+        db.query(func.date(QueryLog.timestamp).label("d"), func.count(QueryLog.id))
+        .filter(QueryLog.timestamp >= week_ago)
+        .group_by("d")
+        .all()
+    )
     queries_over_time = []
-    for i in range(7):
+    for i in range(6, -1, -1):
         day = today - timedelta(days=i)
-        next_day = day + timedelta(days=1)
-        count = db.query(QueryLog).filter(
-            QueryLog.timestamp >= day,
-            QueryLog.timestamp < next_day,
-        ).count()
+        date_str = day.strftime("%Y-%m-%d")
         queries_over_time.append({
-            "date": day.strftime("%Y-%m-%d"),
-            "count": count,
+            "date": date_str,
+            "count": per_day.get(date_str, 0),
         })
-    queries_over_time.reverse()
 
-    return AnalyticsResponse(
+    payload = AnalyticsResponse(
         total_documents=total_docs,
         total_queries=total_queries,
         total_chunks=total_chunks,
@@ -324,6 +402,9 @@ async def get_analytics(db: Session = Depends(get_db)):
         top_questions=top_questions,
         queries_over_time=queries_over_time,
     )
+    _analytics_cache["payload"] = payload
+    _analytics_cache["at"] = time.time()
+    return payload
 
 
 # ═══════════════════════════════════════════════
@@ -341,4 +422,5 @@ async def submit_feedback(
         raise HTTPException(status_code=404, detail="Query not found")
     query.feedback = request.feedback
     db.commit()
+    _invalidate_analytics_cache()
     return {"message": "Feedback recorded", "query_id": request.query_id}
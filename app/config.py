@@ -18,6 +18,8 @@ class Settings(BaseSettings):
     # Groq API
     groq_api_key: str = ""
     llm_model: str = "llama-3.3-70b-versatile"
+    judge_model: str = "llama-3.1-8b-instant"  # faithfulness judging only
+    model_context_tokens: int = 8192  # prompt budget for history packing
 
     # Embeddings (Free, local)
     embedding_model: str = "all-MiniLM-L6-v2"
@@ -39,6 +41,15 @@ class Settings(BaseSettings):
     # Retrieval
     top_k: int = 5
     rerank_top_k: int = 3
+    exact_search_max_chunks: int = 100_000  # brute-force IP below this; 0 = always HNSW
+
+    # Evaluation
+    eval_concurrency: int = 4  # parallel questions per evaluation run
+
+    # Semantic query cache (/ask)
+    semantic_cache_size: int = 1024
+    semantic_cache_ttl: int = 300  # seconds
+    semantic_cache_threshold: float = 0.93  # cosine similarity for a hit
 
     model_config = {
         "env_file": ".env",
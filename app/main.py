@@ -3,6 +3,7 @@ DocuMind AI — FastAPI Application Entry Point
 
 Run with: uvicorn app.main:app --reload
 """
+import asyncio
 import os
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -10,17 +11,44 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse
 from loguru import logger
 
 from app.config import settings
 from app.models.database import init_db
 from app.api.routes import router
 
+# uvloop roughly halves per-request event-loop overhead; it ships with
+# uvicorn[standard] but install() here covers non-uvicorn entry points too
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # pragma: no cover - optional on Windows
+    pass
+
 # Path to built React frontend
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend" / "dist"
 
 
+def _warmup_services():
+    """Instantiate all singletons and JIT the embedding kernels.
+
+    Runs in a worker thread at startup so the first user request doesn't
+    pay the ~2-5 s model load (plus first-encode compilation) itself.
+    """
+    from app.services.embedding import get_embedding_service
+    from app.services.retrieval import get_retrieval_service
+    from app.services.llm import get_llm_service
+    from app.services.guardrails import get_guardrails_service
+
+    embedding = get_embedding_service()
+    embedding.embed_text("warmup")
+    get_retrieval_service()
+    get_llm_service()
+    get_guardrails_service()
+    logger.info("Services warmed up (embedding model preloaded)")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
@@ -28,8 +56,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.app_name}...")
     init_db()
     logger.info("Database initialized")
+    await asyncio.to_thread(_warmup_services)
     yield
     # Shutdown
+    from app.services.llm import get_llm_service
+    await get_llm_service().aclose()
     logger.info(f"{settings.app_name} shutting down")
 
 
@@ -63,13 +94,37 @@ app.add_middleware(
 # Register API routes
 app.include_router(router, prefix="")
 
+# Serve the built React frontend when present; API-only deployments
+# (e.g. the frontend hosted separately on Vercel) fall back to /docs
+_SPA_ENABLED = (FRONTEND_DIR / "index.html").is_file()
+
+if _SPA_ENABLED:
+    app.mount(
+        "/assets",
+        StaticFiles(directory=FRONTEND_DIR / "assets", check_dir=False),
+        name="assets",
+    )
+
+    @app.middleware("http")
+    async def cache_static_assets(request: Request, call_next):
+        """Vite assets are content-hashed — mark them immutable for browsers."""
+        response = await call_next(request)
+        if request.url.path.startswith("/assets/"):
+            response.headers.setdefault(
+                "Cache-Control", "public, max-age=31536000, immutable"
+            )
+        return response
 
-from fastapi.responses import RedirectResponse
+    @app.get("/", include_in_schema=False)
+    async def spa_index():
+        """Serve the SPA entry point."""
+        return FileResponse(FRONTEND_DIR / "index.html")
+else:
+    @app.get("/")
+    async def root():
+        """Redirect root to API documentation."""
+        return RedirectResponse(url="/docs")
 
-@app.get("/")
-async def root():
-    """Redirect root to API documentation."""
-    return RedirectResponse(url="/docs")
 
 @app.get("/health", tags=["Health"])
 async def detailed_health():
@@ -85,3 +140,10 @@ async def detailed_health():
         }
     }
 
+
+if _SPA_ENABLED:
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def spa_fallback(full_path: str):
+        """Serve index.html for client-side routes (registered last)."""
+        return FileResponse(FRONTEND_DIR / "index.html")
+
@@ -1,13 +1,14 @@
 """
 DocuMind AI — Database Models (SQLAlchemy)
 """
+from datetime import datetime, timezone
+
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Text,
+    create_engine, event, func, Column, Index, Integer, String, Text,
     Float, DateTime, Boolean, ForeignKey
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime, timezone
 
 from app.config import settings
 
@@ -16,6 +17,28 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite per connection: WAL + relaxed sync + bigger caches."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.close()
+
+
+def _utcnow():
+    """Python-side timestamp default.
+
+    Kept alongside server_default: create_all only emits DDL for new
+    tables, so databases created before the server defaults existed
+    would otherwise insert NULL timestamps.
+    """
+    return datetime.now(timezone.utc)
+
+
 class Document(Base):
     """Uploaded document metadata."""
     __tablename__ = "documents"
@@ -26,7 +49,9 @@ class Document(Base):
     file_size = Column(Integer, nullable=False)  # bytes
     num_chunks = Column(Integer, default=0)
     num_pages = Column(Integer, default=0)
-    upload_time = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    upload_time = Column(
+        DateTime(timezone=True), default=_utcnow, server_default=func.now(), index=True
+    )
     status = Column(String(50), default="processing")  # processing, ready, error
     collection_name = Column(String(255), nullable=False)
 
@@ -44,12 +69,17 @@ class QueryLog(Base):
     retrieval_score = Column(Float, default=0.0)
     latency_ms = Column(Float, default=0.0)
     tokens_used = Column(Integer, default=0)
-    feedback = Column(String(10), default=None)  # thumbs_up, thumbs_down, None
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    feedback = Column(String(10), default=None, index=True)  # thumbs_up, thumbs_down, None
+    timestamp = Column(
+        DateTime(timezone=True), default=_utcnow, server_default=func.now(), index=True
+    )
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
 
     document = relationship("Document", back_populates="queries")
 
+    # Serves the top-questions GROUP BY in /analytics
+    __table_args__ = (Index("ix_query_logs_question", "question"),)
+
 
 class EvaluationResult(Base):
     """Evaluation harness results."""
@@ -63,7 +93,7 @@ class EvaluationResult(Base):
     answer_faithfulness = Column(Float, default=0.0)
     avg_latency_ms = Column(Float, default=0.0)
     details = Column(Text, default="{}")  # JSON with per-question results
-    run_time = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    run_time = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
 
 
 def init_db():
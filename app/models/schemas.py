@@ -75,6 +75,7 @@ class EvalRequest(BaseModel):
     """Request to run evaluation."""
     test_name: str = "default"
     questions: list[EvalQuestion]
+    refresh_cache: bool = False  # bypass cached retrieval results
 
 
 class EvalResultItem(BaseModel):
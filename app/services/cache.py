@@ -0,0 +1,118 @@
+"""
+DocuMind AI — Semantic Query Cache
+
+Similarity-aware cache for /ask responses: near-duplicate questions
+(cosine similarity >= threshold on normalized query embeddings) return
+the cached answer without re-running retrieval or the LLM.
+"""
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+from app.config import settings
+
+
+class SemanticCache:
+    """In-memory answer cache keyed on normalized query embeddings.
+
+    Entries expire after a TTL and the cache is cleared whenever the
+    document corpus changes (upload/delete), so stale answers are never
+    served against a different set of documents.
+    """
+
+    def __init__(
+        self,
+        max_size: int = None,
+        ttl_seconds: int = None,
+        threshold: float = None,
+    ):
+        self.max_size = max_size or settings.semantic_cache_size
+        self.ttl_seconds = ttl_seconds or settings.semantic_cache_ttl
+        self.threshold = threshold or settings.semantic_cache_threshold
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None  # (N, dim) normalized embeddings
+        self._entries: list[dict] = []  # parallel to matrix rows
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, query_embedding: list[float], document_id: Optional[int] = None):
+        """Return the cached payload for the closest matching query, or None."""
+        vec = np.asarray(query_embedding, dtype=np.float32)
+        now = time.time()
+
+        with self._lock:
+            if self._matrix is None or not self._entries:
+                self._misses += 1
+                return None
+
+            sims = self._matrix @ vec
+            # Consider candidates above threshold, best first
+            for idx in np.argsort(-sims):
+                if sims[idx] < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if entry["document_id"] != document_id:
+                    continue
+                if now - entry["at"] > self.ttl_seconds:
+                    continue
+                self._hits += 1
+                logger.info(f"Semantic cache hit (similarity={sims[idx]:.3f})")
+                return entry["payload"]
+
+            self._misses += 1
+            return None
+
+    def put(self, query_embedding: list[float], payload, document_id: Optional[int] = None):
+        """Store a response against its query embedding."""
+        vec = np.asarray(query_embedding, dtype=np.float32)
+
+        with self._lock:
+            self._entries.append({
+                "payload": payload,
+                "document_id": document_id,
+                "at": time.time(),
+            })
+            if self._matrix is None:
+                self._matrix = vec[None, :]
+            else:
+                self._matrix = np.vstack([self._matrix, vec])
+
+            # Evict oldest entries beyond capacity
+            if len(self._entries) > self.max_size:
+                overflow = len(self._entries) - self.max_size
+                self._entries = self._entries[overflow:]
+                self._matrix = self._matrix[overflow:]
+
+    def clear(self):
+        """Invalidate all entries (called when the corpus changes)."""
+        with self._lock:
+            self._matrix = None
+            self._entries = []
+        logger.info("Semantic cache cleared")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+
+# Singleton
+_semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the singleton semantic cache."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
@@ -4,8 +4,14 @@ DocuMind AI — Embedding Service
 Uses HuggingFace sentence-transformers (FREE, runs locally).
 No API costs, no rate limits.
 """
+import hashlib
+import os
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 
+import numpy as np
+import torch
 from loguru import logger
 from sentence_transformers import SentenceTransformer
 
@@ -28,7 +34,20 @@ class EmbeddingService:
         if self._model is None:
             logger.info(f"Loading embedding model: {settings.embedding_model}")
             self._model = SentenceTransformer(settings.embedding_model)
+            if torch.cuda.is_available():
+                # fp16 halves memory bandwidth and roughly doubles throughput on GPU
+                self._model = self._model.half()
+            else:
+                torch.set_num_threads(os.cpu_count() or 1)
+            self._model.max_seq_length = 256
             logger.info(f"Embedding model loaded (dim={self._model.get_sentence_embedding_dimension()})")
+        if not hasattr(self, "_text_cache"):
+            # LRU cache of single-text embeddings keyed on normalized content
+            self._text_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+            self._text_cache_max = 4096
+            self._text_cache_lock = threading.Lock()
+            self._cache_hits = 0
+            self._cache_misses = 0
 
     @property
     def dimension(self) -> int:
@@ -36,23 +55,56 @@ class EmbeddingService:
         return self._model.get_sentence_embedding_dimension()
 
     def embed_text(self, text: str) -> list[float]:
-        """Embed a single text string."""
+        """Embed a single text string (memoized on normalized content)."""
+        key = hashlib.sha256(text.strip().lower().encode()).digest()
+
+        with self._text_cache_lock:
+            cached = self._text_cache.get(key)
+            if cached is not None:
+                self._cache_hits += 1
+                self._text_cache.move_to_end(key)
+                return cached.tolist()
+            self._cache_misses += 1
+
         embedding = self._model.encode(text, normalize_embeddings=True)
+
+        with self._text_cache_lock:
+            self._text_cache[key] = embedding
+            if len(self._text_cache) > self._text_cache_max:
+                self._text_cache.popitem(last=False)
+
         return embedding.tolist()
 
-    def embed_batch(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
-        """Embed a batch of texts efficiently."""
+    def get_cache_stats(self) -> dict:
+        """Hit/miss counters for the embed_text LRU cache."""
+        with self._text_cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._text_cache),
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": round(self._cache_hits / total, 4) if total else 0.0,
+            }
+
+    def embed_batch(self, texts: list[str], batch_size: int = 128) -> np.ndarray:
+        """Embed a batch of texts efficiently.
+
+        Returns a contiguous float32 (N, dim) array so downstream stores
+        can ingest rows without a per-vector Python list round-trip.
+        """
         if not texts:
-            return []
+            return np.empty((0, self.dimension), dtype=np.float32)
 
         logger.info(f"Embedding {len(texts)} texts in batches of {batch_size}")
-        embeddings = self._model.encode(
-            texts,
-            batch_size=batch_size,
-            normalize_embeddings=True,
-            show_progress_bar=len(texts) > 50,
-        )
-        return embeddings.tolist()
+        with torch.inference_mode():
+            embeddings = self._model.encode(
+                texts,
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
 
 @lru_cache(maxsize=1)
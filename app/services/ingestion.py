@@ -7,8 +7,10 @@ chunking with overlap, and metadata extraction.
 import os
 import hashlib
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+import aiofiles
+import aiofiles.os
 from loguru import logger
 
 from app.config import settings
@@ -47,17 +49,56 @@ class IngestionService:
             return False, f"File too large: {file_size / (1024*1024):.1f}MB (max: {settings.max_file_size_mb}MB)"
         return True, "OK"
 
+    async def save_upload_stream(self, filename: str, file) -> tuple[str, int]:
+        """
+        Stream an UploadFile to disk in 1 MB chunks without holding the
+        whole upload in memory. Returns (filepath, total_bytes).
+
+        The file is written to a temp path and atomically renamed; the hash
+        computed during streaming provides the dedup suffix if needed.
+        """
+        max_bytes = settings.max_file_size_mb * 1024 * 1024
+        filepath = os.path.join(settings.upload_dir, filename)
+        tmp_path = filepath + ".part"
+        hasher = hashlib.blake2b(digest_size=4)
+        size = 0
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                while chunk := await file.read(1 << 20):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(
+                            f"File too large: exceeds {settings.max_file_size_mb}MB limit"
+                        )
+                    hasher.update(chunk)
+                    await f.write(chunk)
+        except ValueError:
+            await aiofiles.os.remove(tmp_path)
+            raise
+
+        # Avoid overwriting: add hash suffix if file exists
+        if await aiofiles.os.path.exists(filepath):
+            name, ext = os.path.splitext(filename)
+            filepath = os.path.join(
+                settings.upload_dir, f"{name}_{hasher.hexdigest()}{ext}"
+            )
+        await aiofiles.os.replace(tmp_path, filepath)
+        logger.info(f"Saved file: {filepath} ({size} bytes)")
+        return filepath, size
+
     async def save_uploaded_file(self, filename: str, content: bytes) -> str:
         """Save uploaded file to disk and return the path."""
         filepath = os.path.join(settings.upload_dir, filename)
-        # Avoid overwriting: add hash suffix if file exists
-        if os.path.exists(filepath):
+        # Avoid overwriting: add hash suffix if file exists (the common
+        # fresh-filename case never pays for the hash)
+        if await aiofiles.os.path.exists(filepath):
             name, ext = os.path.splitext(filename)
-            file_hash = hashlib.md5(content).hexdigest()[:8]
+            file_hash = hashlib.blake2b(content, digest_size=4).hexdigest()
             filepath = os.path.join(settings.upload_dir, f"{name}_{file_hash}{ext}")
 
-        with open(filepath, "wb") as f:
-            f.write(content)
+        async with aiofiles.open(filepath, "wb") as f:
+            await f.write(content)
         logger.info(f"Saved file: {filepath} ({len(content)} bytes)")
         return filepath
 
@@ -76,16 +117,57 @@ class IngestionService:
         else:
             raise ValueError(f"Unsupported file type: {ext}")
 
+    def extract_and_chunk(
+        self,
+        filepath: str,
+        filename: str,
+    ) -> tuple[list[DocumentChunk], int]:
+        """
+        Extract and chunk a file in one pass. Returns (chunks, num_pages).
+
+        PDFs stream page by page, so the full document text is never
+        materialized and chunk page numbers are exact instead of
+        estimated. Other formats fall back to extract_text + chunk_text.
+        """
+        ext = Path(filepath).suffix.lower()
+
+        if ext == ".pdf":
+            from pypdf import PdfReader
+
+            reader = PdfReader(filepath)
+            num_pages = len(reader.pages)
+            chunks = self.chunk_text_pages(
+                self._iter_pdf_pages(reader), filename, num_pages
+            )
+            return chunks, num_pages
+
+        text, num_pages = self.extract_text(filepath)
+        return self.chunk_text(text, filename, num_pages), num_pages
+
+    def _iter_pdf_pages(self, reader) -> Iterator[tuple[int, str]]:
+        """Yield (page_number, text) pairs from a PdfReader lazily."""
+        for page_num, page in enumerate(reader.pages, 1):
+            text = page.extract_text()
+            if text and text.strip():
+                yield page_num, text.strip()
+
     def _extract_pdf(self, filepath: str) -> tuple[str, int]:
-        """Extract text from PDF using pypdf."""
+        """Extract text from PDF using pypdf.
+
+        Pages are parsed serially on purpose: pypdf is pure Python (no
+        GIL release to exploit) and a PdfReader is not safe to share
+        across threads — its lazy object resolution mutates reader state
+        mid-extraction. /upload avoids this path anyway via the
+        streaming extract_and_chunk pipeline.
+        """
         from pypdf import PdfReader
 
         reader = PdfReader(filepath)
         pages = []
         for page in reader.pages:
-            text = page.extract_text()
+            text = (page.extract_text() or "").strip()
             if text:
-                pages.append(text.strip())
+                pages.append(text)
 
         logger.info(f"Extracted {len(pages)} pages from PDF: {filepath}")
         return "\n\n".join(pages), len(pages)
@@ -109,6 +191,66 @@ class IngestionService:
         num_pages = max(1, len(text) // 3000)
         return text, num_pages
 
+    def chunk_text_pages(
+        self,
+        pages: Iterator[tuple[int, str]],
+        filename: str,
+        num_pages: int = 1,
+    ) -> list[DocumentChunk]:
+        """
+        Split a stream of (page_number, text) pairs into overlapping chunks.
+
+        Streaming counterpart of chunk_text: chunks are emitted as soon as
+        the buffer fills, the document is never concatenated into one
+        string, and each chunk's page number is the page it started on
+        rather than a substring-search estimate.
+        """
+        chunks: list[DocumentChunk] = []
+        current_chunk = ""
+        chunk_start_page = 1
+
+        def emit_chunk():
+            nonlocal current_chunk
+            content = current_chunk.strip()
+            chunk_id = hashlib.blake2b(
+                f"{filename}:{len(chunks)}:{content[:50]}".encode(), digest_size=8
+            ).hexdigest()
+            chunks.append(DocumentChunk(
+                content=content,
+                metadata={
+                    "filename": filename,
+                    "chunk_index": len(chunks),
+                    "page": min(num_pages, chunk_start_page),
+                    "total_pages": num_pages,
+                    "char_count": len(content),
+                },
+                chunk_id=chunk_id,
+            ))
+
+        for page_num, page_text in pages:
+            for para in page_text.split("\n\n"):
+                para = para.strip()
+                if not para:
+                    continue
+
+                if len(current_chunk) + len(para) + 2 > self.chunk_size and current_chunk:
+                    emit_chunk()
+                    # Overlap: keep the last chunk_overlap chars
+                    overlap_text = current_chunk[-self.chunk_overlap:] if self.chunk_overlap > 0 else ""
+                    current_chunk = overlap_text + " " + para
+                    chunk_start_page = page_num
+                else:
+                    if not current_chunk:
+                        chunk_start_page = page_num
+                    current_chunk = (current_chunk + "\n\n" + para).strip()
+
+        # Don't forget the last chunk
+        if current_chunk.strip():
+            emit_chunk()
+
+        logger.info(f"Created {len(chunks)} chunks from '{filename}' (streamed)")
+        return chunks
+
     def chunk_text(
         self,
         text: str,
@@ -129,32 +271,35 @@ class IngestionService:
         paragraphs = text.split("\n\n")
 
         current_chunk = ""
-        current_start_page = 1
         chars_per_page = max(1, len(text) // num_pages) if num_pages > 0 else len(text)
 
+        # Character offsets tracked incrementally during the paragraph walk
+        # — no text.find() rescans of the whole document per chunk
+        cursor = 0
+        chunk_start = 0
+
+        def estimate_page(offset: int) -> int:
+            return min(num_pages, max(1, (offset // chars_per_page) + 1))
+
         for para in paragraphs:
+            para_offset = cursor
+            cursor += len(para) + 2  # account for the "\n\n" separator
             para = para.strip()
             if not para:
                 continue
 
             # If adding this paragraph exceeds chunk size, save current and start new
             if len(current_chunk) + len(para) + 2 > self.chunk_size and current_chunk:
-                chunk_id = hashlib.md5(
-                    f"{filename}:{len(chunks)}:{current_chunk[:50]}".encode()
+                chunk_id = hashlib.blake2b(
+                    f"{filename}:{len(chunks)}:{current_chunk[:50]}".encode(), digest_size=8
                 ).hexdigest()
 
-                # Estimate page number based on character position
-                char_position = text.find(current_chunk[:100])
-                estimated_page = min(
-                    num_pages, max(1, (char_position // chars_per_page) + 1)
-                ) if char_position >= 0 else current_start_page
-
                 chunks.append(DocumentChunk(
                     content=current_chunk.strip(),
                     metadata={
                         "filename": filename,
                         "chunk_index": len(chunks),
-                        "page": estimated_page,
+                        "page": estimate_page(chunk_start),
                         "total_pages": num_pages,
                         "char_count": len(current_chunk),
                     },
@@ -164,25 +309,24 @@ class IngestionService:
                 # Overlap: keep the last chunk_overlap chars
                 overlap_text = current_chunk[-self.chunk_overlap:] if self.chunk_overlap > 0 else ""
                 current_chunk = overlap_text + " " + para
+                chunk_start = para_offset
             else:
+                if not current_chunk:
+                    chunk_start = para_offset
                 current_chunk = (current_chunk + "\n\n" + para).strip()
 
         # Don't forget the last chunk
         if current_chunk.strip():
-            chunk_id = hashlib.md5(
-                f"{filename}:{len(chunks)}:{current_chunk[:50]}".encode()
+            chunk_id = hashlib.blake2b(
+                f"{filename}:{len(chunks)}:{current_chunk[:50]}".encode(), digest_size=8
             ).hexdigest()
-            char_position = text.find(current_chunk[:100])
-            estimated_page = min(
-                num_pages, max(1, (char_position // chars_per_page) + 1)
-            ) if char_position >= 0 else num_pages
 
             chunks.append(DocumentChunk(
                 content=current_chunk.strip(),
                 metadata={
                     "filename": filename,
                     "chunk_index": len(chunks),
-                    "page": estimated_page,
+                    "page": estimate_page(chunk_start),
                     "total_pages": num_pages,
                     "char_count": len(current_chunk),
                 },
@@ -4,10 +4,32 @@ DocuMind AI — LLM Service (Groq API)
 Uses Groq's free tier with Llama 3.3 70B — fast inference, no cost.
 Free tier: 14,400 requests/day, 6,000 tokens/min.
 """
-from groq import Groq
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import httpx
+import numpy as np
+from groq import APIConnectionError, AsyncGroq, InternalServerError, RateLimitError
 from loguru import logger
 
 from app.config import settings
+from app.services.embedding import get_embedding_service
+
+# Answers are reused only for near-identical questions against the
+# exact same retrieved context, and only for a bounded window so stale
+# answers can't outlive document churn indefinitely
+_ANSWER_CACHE_SIZE = 1024
+_ANSWER_CACHE_THRESHOLD = 0.97
+_ANSWER_CACHE_TTL = 300  # seconds
+
+# Judging runs at temperature=0, so an identical (question, answer,
+# context) triple always scores the same — cache exact repeats
+_JUDGE_CACHE_SIZE = 4096
 
 
 SYSTEM_PROMPT = """You are DocuMind AI, a premium enterprise document assistant. 
@@ -21,19 +43,81 @@ CRITICAL RULES:
 4. NO REFERENCES LIST. Do not add a "Sources" or "References" section at the end. The system handles this automatically.
 5. CONCISE & EXPERT. Provide the best possible synthesis of the information."""
 
+# One shared system message — the prompt never changes, so there is no
+# reason to allocate a fresh dict for it on every generation
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
 
 class LLMService:
     """Service for generating answers using Groq API (Llama 3.3 70B)."""
 
     def __init__(self):
+        self._http = None
         if not settings.groq_api_key:
             logger.warning("GROQ_API_KEY not set! LLM features will not work.")
             self.client = None
         else:
-            self.client = Groq(api_key=settings.groq_api_key)
+            # Shared HTTP/2 connection pool: concurrent eval/judge calls
+            # multiplex over a handful of warm sockets instead of paying
+            # a TCP + TLS handshake per request. keepalive_expiry keeps
+            # sockets warm across eval bursts (~a minute apart) without
+            # holding dozens of idle TLS sessions open indefinitely
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=40,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self.client = AsyncGroq(
+                api_key=settings.groq_api_key, http_client=self._http
+            )
             logger.info(f"Groq client initialized (model: {settings.llm_model})")
 
-    def generate_answer(
+        # Semantic answer cache: (question embedding, context hash) → result
+        self._answer_cache: deque = deque(maxlen=_ANSWER_CACHE_SIZE)
+        self._answer_cache_lock = threading.Lock()
+
+        # Exact LRU for deterministic faithfulness judgments
+        self._judge_cache: OrderedDict = OrderedDict()
+        self._judge_cache_lock = threading.Lock()
+
+    async def aclose(self):
+        """Close the pooled HTTP client (called on app shutdown)."""
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def _create_with_retry(self, **kwargs):
+        """
+        Chat-completion call with bounded backoff on transient failures.
+
+        Free-tier 429s, connection blips, and Groq-side 5xxs are common
+        under eval bursts; retry those (3 attempts, 0.5·2^n seconds plus
+        jitter, honoring a Retry-After header when Groq sends one) and
+        let every other error propagate to the caller's existing
+        handling.
+        """
+        for attempt in range(3):
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt == 2:
+                    raise
+                delay = 0.5 * (2 ** attempt) + random.random() * 0.25
+                response = getattr(e, "response", None)
+                if response is not None:
+                    try:
+                        delay = max(delay, float(response.headers.get("retry-after", 0)))
+                    except (TypeError, ValueError):
+                        pass
+                logger.warning(
+                    f"Groq {type(e).__name__}; retry {attempt + 1}/2 in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def generate_answer(
         self,
         question: str,
         context_chunks: list[dict],
@@ -48,40 +132,45 @@ class LLMService:
             conversation_history: Optional previous messages for multi-turn
 
         Returns:
-            dict with 'answer', 'tokens_used', 'model'
+            dict with 'answer', 'tokens_used', 'model', 'error'
+            ('error' is True when the answer is a failure message rather
+            than a real generation — callers must not cache those)
         """
         if not self.client:
             return {
                 "answer": "⚠️ LLM service not configured. Please set GROQ_API_KEY in your .env file.",
                 "tokens_used": 0,
                 "model": "none",
+                "error": True,
             }
 
         # Build context string from retrieved chunks
         context_str = self._format_context(context_chunks)
 
-        # Build messages
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-
-        # Add conversation history if provided (for multi-turn)
-        if conversation_history:
-            messages.extend(conversation_history[-6:])  # Last 3 turns
-
-        # Add current question with context
-        user_message = f"""Based on the following context from the user's documents, answer the question.
-
-=== CONTEXT ===
-{context_str}
-=== END CONTEXT ===
+        # Semantic cache: near-duplicate question + identical context
+        # skips the Groq round-trip (multi-turn answers depend on history,
+        # so those bypass the cache)
+        query_embedding = None
+        context_hash = None
+        if not conversation_history:
+            context_hash = hashlib.blake2b(
+                context_str.encode(), digest_size=16
+            ).digest()
+            # Embedding is CPU-bound — keep it off the event loop
+            query_embedding = np.asarray(
+                await asyncio.to_thread(
+                    get_embedding_service().embed_text, question
+                ),
+                dtype=np.float32,
+            )
+            cached = self._answer_cache_get(query_embedding, context_hash)
+            if cached is not None:
+                return cached
 
-Question: {question}
-
-Remember: ONLY use information from the context above. Cite sources."""
-
-        messages.append({"role": "user", "content": user_message})
+        messages = self._build_messages(question, context_str, conversation_history)
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_with_retry(
                 model=settings.llm_model,
                 messages=messages,
                 temperature=0.1,  # Low temp for factual accuracy
@@ -92,11 +181,15 @@ Remember: ONLY use information from the context above. Cite sources."""
             answer = response.choices[0].message.content
             tokens_used = response.usage.total_tokens if response.usage else 0
 
-            return {
+            result = {
                 "answer": answer,
                 "tokens_used": tokens_used,
                 "model": settings.llm_model,
+                "error": False,
             }
+            if query_embedding is not None:
+                self._answer_cache_put(query_embedding, context_hash, result)
+            return result
 
         except Exception as e:
             logger.error(f"Groq API error: {e}")
@@ -104,9 +197,102 @@ Remember: ONLY use information from the context above. Cite sources."""
                 "answer": f"⚠️ Error generating answer: {str(e)}",
                 "tokens_used": 0,
                 "model": settings.llm_model,
+                "error": True,
             }
 
-    def evaluate_faithfulness(
+    def _build_messages(
+        self,
+        question: str,
+        context_str: str,
+        conversation_history: list[dict] = None,
+    ) -> list[dict]:
+        """Assemble the chat messages for a generation request."""
+        # Build current question with context first — its size determines
+        # how much room is left for history
+        user_message = f"""Based on the following context from the user's documents, answer the question.
+
+=== CONTEXT ===
+{context_str}
+=== END CONTEXT ===
+
+Question: {question}
+
+Remember: ONLY use information from the context above. Cite sources."""
+
+        messages = [_SYSTEM_MSG]
+
+        # Add conversation history (for multi-turn): as many recent turns
+        # as the model's context window can hold, rather than a fixed
+        # message count that can blow past Groq's token budget on large
+        # turns and trigger 429 retries
+        if conversation_history:
+            budget = (
+                settings.model_context_tokens
+                - 1024  # response reservation (matches max_tokens)
+                - (len(SYSTEM_PROMPT) + len(user_message)) // 4
+            )
+            messages.extend(self._fit_history(conversation_history, budget))
+
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    @staticmethod
+    def _fit_history(history: list[dict], budget_tokens: int) -> list[dict]:
+        """
+        Keep the most recent history messages that fit a token budget.
+
+        Uses the ~4 chars/token heuristic (plus a small per-message
+        overhead for role framing) — close enough for budgeting without
+        pulling in a tokenizer.
+        """
+        kept: list[dict] = []
+        used = 0
+        for msg in reversed(history):
+            cost = len(msg.get("content", "")) // 4 + 4
+            if used + cost > budget_tokens:
+                break
+            kept.append(msg)
+            used += cost
+        kept.reverse()
+        return kept
+
+    def _answer_cache_get(self, query_embedding: np.ndarray, context_hash: bytes):
+        """Return a cached result for a near-duplicate question, or None."""
+        now = time.monotonic()
+        with self._answer_cache_lock:
+            candidates = [
+                entry for entry in self._answer_cache
+                if entry["context_hash"] == context_hash
+                and now - entry["ts"] < _ANSWER_CACHE_TTL
+            ]
+            if not candidates:
+                return None
+
+            sims = np.stack([e["embedding"] for e in candidates]) @ query_embedding
+            best = int(np.argmax(sims))
+            if sims[best] < _ANSWER_CACHE_THRESHOLD:
+                return None
+
+            # SIM-LRU: refresh the hit so it outlives colder entries
+            entry = candidates[best]
+            self._answer_cache.remove(entry)
+            self._answer_cache.append(entry)
+            logger.info(f"Answer cache hit (similarity={sims[best]:.3f})")
+            return entry["result"]
+
+    def _answer_cache_put(
+        self, query_embedding: np.ndarray, context_hash: bytes, result: dict
+    ):
+        """Store a successful generation (deque drops the coldest entry)."""
+        with self._answer_cache_lock:
+            self._answer_cache.append({
+                "embedding": query_embedding,
+                "context_hash": context_hash,
+                "result": result,
+                "ts": time.monotonic(),
+            })
+
+    async def evaluate_faithfulness(
         self,
         question: str,
         answer: str,
@@ -115,10 +301,22 @@ Remember: ONLY use information from the context above. Cite sources."""
         """
         Score how faithful the answer is to the context (0.0 - 1.0).
         Used in the evaluation harness.
+
+        temperature=0 makes the judgment deterministic, so exact repeats
+        (common across iterative eval runs) are answered from an LRU
+        cache without spending a Groq request.
         """
         if not self.client:
             return 0.0
 
+        key = hashlib.blake2b(
+            f"{question}\x1f{answer}\x1f{context[:2000]}".encode(), digest_size=16
+        ).digest()
+        with self._judge_cache_lock:
+            if key in self._judge_cache:
+                self._judge_cache.move_to_end(key)
+                return self._judge_cache[key]
+
         eval_prompt = f"""You are an evaluation judge. Score how faithful the answer is to the provided context.
 
 Context: {context[:2000]}
@@ -135,16 +333,84 @@ Score the faithfulness from 0.0 to 1.0:
 Respond with ONLY a number between 0.0 and 1.0, nothing else."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=settings.llm_model,
+            response = await self._create_with_retry(
+                model=settings.judge_model,
                 messages=[{"role": "user", "content": eval_prompt}],
                 temperature=0.0,
-                max_tokens=10,
+                max_tokens=4,  # a single float fits
             )
             score_text = response.choices[0].message.content.strip()
-            return max(0.0, min(1.0, float(score_text)))
+            score = max(0.0, min(1.0, float(score_text)))
         except Exception:
-            return 0.5  # Default to neutral on error
+            return 0.5  # Default to neutral on error (not cached)
+
+        with self._judge_cache_lock:
+            self._judge_cache[key] = score
+            self._judge_cache.move_to_end(key)
+            while len(self._judge_cache) > _JUDGE_CACHE_SIZE:
+                self._judge_cache.popitem(last=False)
+        return score
+
+    async def evaluate_faithfulness_batch(
+        self,
+        items: list[tuple[str, str, str]],
+    ) -> list[float]:
+        """
+        Score many (question, answer, context) triples in one judge call.
+
+        Halves the LLM calls of an evaluation run versus per-item judging
+        and amortizes the judge prompt tokens. Falls back to per-item
+        scoring if the batched response can't be parsed.
+        """
+        if not items:
+            return []
+        if not self.client:
+            return [0.0] * len(items)
+        if len(items) == 1:
+            return [await self.evaluate_faithfulness(*items[0])]
+
+        blocks = []
+        for i, (question, answer, context) in enumerate(items, 1):
+            blocks.append(
+                f"ITEM {i}:\n"
+                f"Context: {context[:2000]}\n"
+                f"Question: {question}\n"
+                f"Answer: {answer}"
+            )
+
+        eval_prompt = f"""You are an evaluation judge. For each of the {len(items)} items below, score how faithful the Answer is to its Context.
+
+{chr(10).join(blocks)}
+
+Score each item from 0.0 to 1.0:
+- 1.0 = Answer is completely supported by the context
+- 0.5 = Answer is partially supported
+- 0.0 = Answer contains information not in the context (hallucination)
+
+Respond with ONLY a JSON object of the form {{"scores": [s1, s2, ...]}} containing exactly {len(items)} floats, nothing else."""
+
+        try:
+            response = await self._create_with_retry(
+                model=settings.judge_model,
+                messages=[{"role": "user", "content": eval_prompt}],
+                temperature=0.0,
+                max_tokens=10 * len(items) + 20,
+                response_format={"type": "json_object"},
+            )
+            data = json.loads(response.choices[0].message.content)
+            scores = data.get("scores") if isinstance(data, dict) else data
+            if not isinstance(scores, list) or len(scores) != len(items):
+                raise ValueError(f"expected {len(items)} scores, got {scores!r}")
+            return [max(0.0, min(1.0, float(s))) for s in scores]
+        except Exception as e:
+            logger.warning(f"Batch faithfulness judging failed ({e}); falling back to per-item")
+            # Fan the per-item judges out concurrently; a stray failure
+            # degrades that one item to neutral instead of the whole run
+            scores = await asyncio.gather(
+                *(self.evaluate_faithfulness(q, a, c) for q, a, c in items),
+                return_exceptions=True,
+            )
+            return [0.5 if isinstance(s, BaseException) else s for s in scores]
 
     def _format_context(self, chunks: list[dict]) -> str:
         """Format context chunks into a clean string for the LLM."""
@@ -4,18 +4,99 @@ DocuMind AI — Retrieval Service
 Hybrid search: ChromaDB semantic search + BM25 keyword search + score fusion.
 """
 import json
+import pickle
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 from loguru import logger
-from rank_bm25 import BM25Okapi
+from scipy import sparse
 
 from app.config import settings
 from app.services.embedding import get_embedding_service
 from app.services.ingestion import DocumentChunk
 
 
+# Bump when the on-disk BM25 snapshot layout changes so stale pickles
+# are rebuilt instead of misread
+_BM25_CACHE_VERSION = 3
+
+# One compiled tokenizer shared by indexing and queries: alphanumeric
+# runs only, so punctuation stuck to words ("cost," vs "cost") can no
+# longer split the same term across vocabulary entries
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class _SparseBM25:
+    """
+    Vectorized BM25 (Okapi variant) over a SciPy sparse matrix.
+
+    Replaces rank_bm25.BM25Okapi's per-term Python loop: the full tf
+    weight is precomputed at build time into a float32 CSC matrix, so
+    scoring a query is one sparse matrix-vector product in C. Documents
+    arrive as int32 token-id arrays interned through a per-collection
+    vocabulary — a fraction of the memory (and cache pressure) of lists
+    of Python strings.
+    """
+
+    def __init__(
+        self, corpus: list[np.ndarray], n_terms: int, k1: float = 1.5, b: float = 0.75
+    ):
+        n_docs = len(corpus)
+        doc_lens = np.zeros(n_docs, dtype=np.float64)
+        row_parts: list[np.ndarray] = []
+        col_parts: list[np.ndarray] = []
+        tf_parts: list[np.ndarray] = []
+
+        for i, doc_ids in enumerate(corpus):
+            doc_lens[i] = doc_ids.size
+            if doc_ids.size == 0:
+                continue
+            uniq, counts = np.unique(doc_ids, return_counts=True)
+            row_parts.append(np.full(uniq.size, i, dtype=np.int64))
+            col_parts.append(uniq.astype(np.int64))
+            tf_parts.append(counts)
+
+        if n_docs == 0 or n_terms == 0 or not row_parts:
+            self._matrix = sparse.csc_matrix((n_docs, n_terms), dtype=np.float32)
+            return
+
+        rows_arr = np.concatenate(row_parts)
+        cols_arr = np.concatenate(col_parts)
+        tf_arr = np.concatenate(tf_parts).astype(np.float64)
+
+        # idf(t) = ln(1 + (N - df + 0.5) / (df + 0.5))
+        df = np.bincount(cols_arr, minlength=n_terms)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        # w(t, d) = idf(t) · tf·(k1+1) / (tf + k1·(1 - b + b·|d|/avgdl))
+        avgdl = doc_lens.mean()
+        denom = tf_arr + k1 * (1.0 - b + b * doc_lens[rows_arr] / avgdl)
+        weights = (idf[cols_arr] * tf_arr * (k1 + 1.0) / denom).astype(np.float32)
+
+        # CSC: get_scores selects columns (one per query term)
+        self._matrix = sparse.csc_matrix(
+            (weights, (rows_arr, cols_arr)), shape=(n_docs, n_terms)
+        )
+
+    def get_scores(self, query_ids: np.ndarray) -> np.ndarray:
+        """BM25 score of every document against the query token ids."""
+        # Ids minted after this matrix was built (vocab growth between
+        # sub-index rebuilds) can't score here — drop them
+        query_ids = query_ids[query_ids < self._matrix.shape[1]]
+        if query_ids.size == 0:
+            return np.zeros(self._matrix.shape[0], dtype=np.float32)
+
+        col_ids, multiplicity = np.unique(query_ids, return_counts=True)
+        return self._matrix[:, col_ids.astype(np.int64)] @ multiplicity.astype(
+            np.float32
+        )
+
+
 class RetrievalService:
     """Service for storing and retrieving document chunks using hybrid search."""
 
@@ -29,14 +110,57 @@ class RetrievalService:
         )
         logger.info(f"ChromaDB initialized at: {settings.chroma_persist_dir}")
 
-        # BM25 indexes per collection (in-memory, rebuilt on startup)
-        self._bm25_indexes: dict[str, tuple[BM25Okapi, list[dict]]] = {}
+        # BM25 indexes per collection. The tokenized corpus is kept (and
+        # snapshotted to disk) so restarts load it instead of re-pulling
+        # and re-splitting every document, and indexing appends only the
+        # new chunks' tokens
+        self._bm25_indexes: dict[str, tuple[_SparseBM25, list[dict]]] = {}
+        self._bm25_tokenized: dict[str, list[np.ndarray]] = {}
+        self._bm25_vocab: dict[str, dict[str, int]] = {}
+
+        # chunk_id → corpus entry (shared references into corpus_data):
+        # lets _semantic_search skip asking Chroma to materialize the
+        # document bodies it already holds in memory
+        self._chunk_store: dict[str, dict[str, dict]] = {}
+
+        # Dense (matrix, entries) per collection for the exact search
+        # path: below exact_search_max_chunks a brute-force inner product
+        # has perfect recall and beats the HNSW walk outright
+        self._dense_index: dict[str, tuple[np.ndarray, list[dict]]] = {}
+
+        # Per-filename sub-indexes: a document_filter query scores only
+        # that file's chunks instead of the whole corpus. Values are
+        # (scorer, corpus indices); token lists are shared by reference
+        self._bm25_by_file: dict[str, dict[str, tuple[_SparseBM25, list[int]]]] = {}
+        self._bm25_cache_dir = Path(settings.chroma_persist_dir) / "bm25"
+        self._bm25_cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Bumped on every index/delete so callers caching search results
+        # (e.g. the evaluation harness) can tell when a collection changed
+        self._collection_versions: dict[str, int] = {}
+
+        # Runs the two independent search branches side by side — the
+        # ChromaDB query and BM25's sparse product both release the GIL
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="hybrid-search"
+        )
+
+    def collection_version(self, collection_name: str) -> int:
+        """Monotonic counter that changes whenever a collection's contents do."""
+        return self._collection_versions.get(collection_name, 0)
 
     def get_or_create_collection(self, name: str):
-        """Get or create a ChromaDB collection."""
+        """Get or create a ChromaDB collection.
+
+        Inner-product space: every vector we store or query is already
+        L2-normalized, so ip equals cosine while skipping the per-vector
+        renormalization cosine does inside HNSW on each comparison.
+        (Only applies to newly created collections — Chroma fixes the
+        space at creation time.)
+        """
         collection = self.chroma_client.get_or_create_collection(
             name=name,
-            metadata={"hnsw:space": "cosine"},
+            metadata={"hnsw:space": "ip"},
         )
         return collection
 
@@ -60,8 +184,15 @@ class RetrievalService:
         ids = [c.chunk_id for c in chunks]
         metadatas = [c.metadata for c in chunks]
 
-        # Generate embeddings
-        embeddings = self.embedding_service.embed_batch(texts)
+        # Generate embeddings. embed_batch normalizes, but guard against
+        # a future model/config that doesn't — unit vectors are what
+        # makes the ip space below equivalent to cosine
+        embeddings = np.asarray(
+            self.embedding_service.embed_batch(texts), dtype=np.float32
+        )
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(
+            min=1e-12
+        )
 
         # Upsert into ChromaDB
         collection.upsert(
@@ -71,8 +202,34 @@ class RetrievalService:
             metadatas=metadatas,
         )
 
-        # Build BM25 index for this collection
-        self._rebuild_bm25_index(collection_name)
+        # Keep the exact-search matrix in step: append the new rows, or
+        # drop it so the next query rebuilds when an upsert touched
+        # existing ids
+        dense = self._dense_index.get(collection_name)
+        if dense is not None:
+            matrix, entries = dense
+            known = {e["chunk_id"] for e in entries}
+            if any(c.chunk_id in known for c in chunks):
+                self._dense_index.pop(collection_name, None)
+            else:
+                self._dense_index[collection_name] = (
+                    np.vstack([matrix, embeddings]),
+                    entries + [
+                        {
+                            "chunk_id": c.chunk_id,
+                            "content": c.content,
+                            "filename": c.metadata.get("filename", "Unknown"),
+                            "page": c.metadata.get("page", None),
+                        }
+                        for c in chunks
+                    ],
+                )
+
+        # Update BM25: tokenize only the new chunks when possible
+        self._append_bm25(collection_name, chunks)
+        self._collection_versions[collection_name] = (
+            self._collection_versions.get(collection_name, 0) + 1
+        )
 
         logger.info(f"Indexed {len(chunks)} chunks into collection '{collection_name}'")
         return len(chunks)
@@ -83,29 +240,34 @@ class RetrievalService:
         collection_name: str,
         top_k: int = None,
         document_filter: Optional[str] = None,
+        query_embedding: Optional[list[float]] = None,
     ) -> list[dict]:
         """
         Hybrid search: combine semantic search + BM25, then fuse scores.
 
+        Pass `query_embedding` if the caller already embedded the query
+        (e.g. for the /ask semantic cache) to skip re-encoding it here.
+
         Returns list of dicts with: content, document, page, score, chunk_id
         """
         top_k = top_k or settings.top_k
 
-        # 1. Semantic search (ChromaDB)
-        semantic_results = self._semantic_search(
-            query, collection_name, top_k=top_k * 2, document_filter=document_filter
+        # 1+2. Semantic (ChromaDB) and BM25 branches are independent, so
+        # run them concurrently and wait for the slower one
+        semantic_future = self._search_pool.submit(
+            self._semantic_search,
+            query, collection_name, top_k=top_k * 2, document_filter=document_filter,
+            query_embedding=query_embedding,
         )
-
-        # 2. BM25 keyword search
         bm25_results = self._bm25_search(
             query, collection_name, top_k=top_k * 2, document_filter=document_filter
         )
+        semantic_results = semantic_future.result()
 
         # 3. Reciprocal Rank Fusion (combine both result sets)
-        fused = self._reciprocal_rank_fusion(semantic_results, bm25_results, k=60)
-
-        # Return top_k results
-        results = fused[:top_k]
+        results = self._reciprocal_rank_fusion(
+            semantic_results, bm25_results, k=60, top_k=top_k
+        )
         logger.info(
             f"Hybrid search for '{query[:50]}...' → "
             f"{len(semantic_results)} semantic + {len(bm25_results)} BM25 → "
@@ -119,45 +281,155 @@ class RetrievalService:
         collection_name: str,
         top_k: int = 10,
         document_filter: Optional[str] = None,
+        query_embedding: Optional[list[float]] = None,
     ) -> list[dict]:
         """Semantic search using ChromaDB."""
         collection = self.get_or_create_collection(collection_name)
 
-        if collection.count() == 0:
+        count = collection.count()
+        if count == 0:
             return []
 
-        # Generate query embedding
-        query_embedding = self.embedding_service.embed_text(query)
-
-        # Build where filter if document_filter is provided
+        # Generate query embedding unless the caller supplied one
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        # Exact path for small corpora: full recall, no HNSW traversal,
+        # and document filters cost nothing extra
+        if 0 < count <= settings.exact_search_max_chunks:
+            dense = self._ensure_dense_index(collection_name, collection, count)
+            if dense is not None:
+                return self._exact_search(
+                    dense, query_embedding, top_k, document_filter
+                )
+
+        # Build where filter if document_filter is provided. Chroma walks
+        # the HNSW graph first and applies the filter to what it found,
+        # so a filtered query must oversample or recall collapses when
+        # the target file is a small slice of the collection
         where_filter = None
+        n_results = min(top_k, count)
         if document_filter:
             where_filter = {"filename": document_filter}
+            n_results = min(max(top_k * 10, 50), count)
+
+        # When the in-memory chunk store covers this collection, skip
+        # having Chroma materialize the document bodies from SQLite —
+        # they're resolved locally by id below
+        store = self._chunk_store.get(collection_name)
+        include = ["metadatas", "distances"]
+        if not store:
+            include.append("documents")
 
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=min(top_k, collection.count()),
+            n_results=n_results,
             where=where_filter,
-            include=["documents", "metadatas", "distances"],
+            include=include,
         )
 
         parsed = []
         if results and results["ids"] and results["ids"][0]:
             for i, chunk_id in enumerate(results["ids"][0]):
-                # ChromaDB returns cosine distance, convert to similarity
+                # ChromaDB returns 1 - inner product, which on unit
+                # vectors is exactly cosine distance — convert to similarity
                 distance = results["distances"][0][i] if results["distances"] else 0
                 similarity = max(0.0, 1.0 - distance)
 
                 metadata = results["metadatas"][0][i] if results["metadatas"] else {}
+                if store is not None:
+                    entry = store.get(chunk_id)
+                    content = entry["content"] if entry is not None else ""
+                else:
+                    content = results["documents"][0][i]
                 parsed.append({
                     "chunk_id": chunk_id,
-                    "content": results["documents"][0][i],
+                    "content": content,
                     "document": metadata.get("filename", "Unknown"),
                     "page": metadata.get("page", None),
                     "score": similarity,
                     "source": "semantic",
                 })
 
+        # Trim back down when the filtered path oversampled
+        return parsed[:top_k]
+
+    def _ensure_dense_index(
+        self, collection_name: str, collection, count: int
+    ) -> Optional[tuple[np.ndarray, list[dict]]]:
+        """
+        Return the dense (matrix, entries) pair for exact search, building
+        it from ChromaDB on first use. A row-count mismatch (upserts,
+        deletes since the build) triggers a rebuild.
+        """
+        dense = self._dense_index.get(collection_name)
+        if dense is not None and dense[0].shape[0] == count:
+            return dense
+
+        all_data = collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = np.asarray(all_data["embeddings"], dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] == 0:
+            return None
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(
+            min=1e-12
+        )
+
+        entries = []
+        for i, chunk_id in enumerate(all_data["ids"]):
+            metadata = all_data["metadatas"][i] if all_data["metadatas"] else {}
+            entries.append({
+                "chunk_id": chunk_id,
+                "content": all_data["documents"][i],
+                "filename": metadata.get("filename", "Unknown"),
+                "page": metadata.get("page", None),
+            })
+
+        dense = (embeddings, entries)
+        self._dense_index[collection_name] = dense
+        logger.info(
+            f"Dense exact-search index built for '{collection_name}' "
+            f"({embeddings.shape[0]} vectors)"
+        )
+        return dense
+
+    def _exact_search(
+        self,
+        dense: tuple[np.ndarray, list[dict]],
+        query_embedding: list[float],
+        top_k: int,
+        document_filter: Optional[str] = None,
+    ) -> list[dict]:
+        """Brute-force inner-product search over the dense matrix."""
+        matrix, entries = dense
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        sims = matrix @ query
+        if document_filter:
+            mask = np.fromiter(
+                (e["filename"] == document_filter for e in entries),
+                dtype=bool,
+                count=len(entries),
+            )
+            sims = np.where(mask, sims, -np.inf)
+
+        k = min(top_k, sims.size)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+
+        parsed = []
+        for i in top:
+            if not np.isfinite(sims[i]):
+                break  # filter excluded everything past here
+            entry = entries[i]
+            parsed.append({
+                "chunk_id": entry["chunk_id"],
+                "content": entry["content"],
+                "document": entry["filename"],
+                "page": entry["page"],
+                "score": max(0.0, float(sims[i])),
+                "source": "semantic",
+            })
         return parsed
 
     def _bm25_search(
@@ -176,25 +448,26 @@ class RetrievalService:
 
         bm25, corpus_data = self._bm25_indexes[collection_name]
 
-        # Filter by document if needed
+        # Tokenize query and intern through the collection vocabulary
+        vocab = self._bm25_vocab.get(collection_name, {})
+        query_ids = self._encode_tokens(vocab, query, grow=False)
+
         if document_filter:
-            filtered_indices = [
-                i for i, d in enumerate(corpus_data)
-                if d.get("filename") == document_filter
-            ]
-            if not filtered_indices:
+            # Score only the filtered file's chunks via its sub-index
+            # instead of the whole corpus
+            sub = self._bm25_by_file.get(collection_name, {}).get(document_filter)
+            if sub is None:
                 return []
+            sub_bm25, sub_indices = sub
+            sub_scores = sub_bm25.get_scores(query_ids)
+            scored_results = [
+                (sub_indices[i], s) for i, s in enumerate(sub_scores) if s > 0
+            ]
         else:
-            filtered_indices = list(range(len(corpus_data)))
-
-        # Tokenize query
-        query_tokens = query.lower().split()
-        scores = bm25.get_scores(query_tokens)
-
-        # Get top results from filtered indices
-        scored_results = [
-            (idx, scores[idx]) for idx in filtered_indices if scores[idx] > 0
-        ]
+            scores = bm25.get_scores(query_ids)
+            scored_results = [
+                (idx, s) for idx, s in enumerate(scores) if s > 0
+            ]
         scored_results.sort(key=lambda x: x[1], reverse=True)
 
         results = []
@@ -220,36 +493,211 @@ class RetrievalService:
         semantic_results: list[dict],
         bm25_results: list[dict],
         k: int = 60,
+        top_k: Optional[int] = None,
     ) -> list[dict]:
         """
         Reciprocal Rank Fusion (RRF) to combine two result lists.
         Score = sum(1 / (k + rank)) across all lists.
+
+        Scores are accumulated in a NumPy array indexed by a chunk-id →
+        slot map rather than per-chunk dict updates; the rank weights
+        1/(k+rank+1) are computed vectorized for each list. With top_k
+        set, only the winners are selected (argpartition) and
+        materialized as output dicts — the losing entries are never
+        copied or fully sorted.
+        """
+        id_to_slot: dict[str, int] = {}
+        payloads: list[dict] = []
+        semantic_slots: list[int] = []
+        bm25_slots: list[int] = []
+
+        for results, slots in (
+            (semantic_results, semantic_slots),
+            (bm25_results, bm25_slots),
+        ):
+            for result in results:
+                slot = id_to_slot.get(result["chunk_id"])
+                if slot is None:
+                    slot = len(payloads)
+                    id_to_slot[result["chunk_id"]] = slot
+                    payloads.append(result)
+                slots.append(slot)
+
+        if not payloads:
+            return []
+
+        scores = np.zeros(len(payloads))
+        for slots in (semantic_slots, bm25_slots):
+            if slots:
+                # np.add.at handles chunks appearing in both lists
+                np.add.at(
+                    scores,
+                    np.asarray(slots),
+                    1.0 / (k + np.arange(len(slots)) + 1.0),
+                )
+
+        if top_k is not None and top_k < len(payloads):
+            # Partial selection: O(n) partition + O(top_k log top_k) sort
+            winners = np.argpartition(-scores, top_k)[:top_k]
+            order = winners[np.argsort(-scores[winners])]
+        else:
+            order = np.argsort(-scores)
+        return [
+            {**payloads[i], "score": float(scores[i]), "source": "hybrid"}
+            for i in order
+        ]
+
+    @staticmethod
+    def _encode_tokens(vocab: dict[str, int], text: str, grow: bool) -> np.ndarray:
+        """Intern a text's tokens as int32 ids through the collection vocab.
+
+        Indexing grows the vocabulary; queries (grow=False) silently drop
+        tokens the corpus has never seen.
+        """
+        tokens = _TOKEN_RE.findall(text.lower())
+        if grow:
+            ids = [vocab.setdefault(t, len(vocab)) for t in tokens]
+        else:
+            ids = [vocab[t] for t in tokens if t in vocab]
+        return np.asarray(ids, dtype=np.int32)
+
+    def _build_bm25_subindexes(
+        self, collection_name: str, filenames: Optional[set[str]] = None
+    ):
+        """
+        (Re)build per-filename BM25 sub-indexes for filtered search.
+
+        Pass `filenames` to rebuild only the files an append touched.
+        Token lists are shared with the main corpus by reference, so the
+        extra memory is one scorer matrix per file.
+        """
+        _, corpus_data = self._bm25_indexes[collection_name]
+        tokenized_corpus = self._bm25_tokenized[collection_name]
+
+        groups: dict[str, list[int]] = {}
+        for idx, data in enumerate(corpus_data):
+            groups.setdefault(data.get("filename", "Unknown"), []).append(idx)
+
+        by_file = self._bm25_by_file.setdefault(collection_name, {})
+        for fname, indices in groups.items():
+            if filenames is not None and fname not in filenames:
+                continue
+            by_file[fname] = (
+                _SparseBM25(
+                    [tokenized_corpus[i] for i in indices],
+                    len(self._bm25_vocab[collection_name]),
+                ),
+                indices,
+            )
+
+        if filenames is None:
+            # Full rebuild: drop sub-indexes for files no longer present
+            for fname in list(by_file):
+                if fname not in groups:
+                    del by_file[fname]
+
+    def _bm25_cache_path(self, collection_name: str) -> Path:
+        return self._bm25_cache_dir / f"{collection_name}.pkl"
+
+    def _save_bm25_snapshot(self, collection_name: str):
+        """Persist the tokenized corpus so restarts skip re-tokenization."""
+        try:
+            with open(self._bm25_cache_path(collection_name), "wb") as f:
+                pickle.dump(
+                    (
+                        _BM25_CACHE_VERSION,
+                        self._bm25_vocab[collection_name],
+                        self._bm25_tokenized[collection_name],
+                        self._bm25_indexes[collection_name][1],
+                    ),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+        except OSError as e:
+            logger.warning(f"Could not persist BM25 snapshot for '{collection_name}': {e}")
+
+    def _load_bm25_snapshot(self, collection_name: str, expected_count: int) -> bool:
+        """Load a persisted tokenized corpus; False if missing or stale."""
+        path = self._bm25_cache_path(collection_name)
+        if not path.exists():
+            return False
+        try:
+            with open(path, "rb") as f:
+                version, vocab, tokenized_corpus, corpus_data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, ValueError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable BM25 snapshot for '{collection_name}': {e}")
+            return False
+
+        # Stale if the layout changed or the collection has since diverged
+        if version != _BM25_CACHE_VERSION or len(corpus_data) != expected_count:
+            return False
+
+        bm25 = _SparseBM25(tokenized_corpus, len(vocab))
+        self._bm25_indexes[collection_name] = (bm25, corpus_data)
+        self._bm25_tokenized[collection_name] = tokenized_corpus
+        self._bm25_vocab[collection_name] = vocab
+        self._chunk_store[collection_name] = {d["chunk_id"]: d for d in corpus_data}
+        self._build_bm25_subindexes(collection_name)
+        logger.info(
+            f"BM25 index loaded from snapshot for '{collection_name}' "
+            f"({len(corpus_data)} docs)"
+        )
+        return True
+
+    def _append_bm25(self, collection_name: str, chunks: list[DocumentChunk]):
         """
-        fused_scores: dict[str, dict] = {}
-
-        for rank, result in enumerate(semantic_results):
-            chunk_id = result["chunk_id"]
-            if chunk_id not in fused_scores:
-                fused_scores[chunk_id] = {**result, "score": 0.0, "source": "hybrid"}
-            fused_scores[chunk_id]["score"] += 1.0 / (k + rank + 1)
-
-        for rank, result in enumerate(bm25_results):
-            chunk_id = result["chunk_id"]
-            if chunk_id not in fused_scores:
-                fused_scores[chunk_id] = {**result, "score": 0.0, "source": "hybrid"}
-            fused_scores[chunk_id]["score"] += 1.0 / (k + rank + 1)
-
-        # Sort by fused score
-        fused_list = sorted(
-            fused_scores.values(), key=lambda x: x["score"], reverse=True
+        Extend the BM25 index with newly indexed chunks.
+
+        Only the new texts are tokenized; the sparse scorer is rebuilt over
+        the extended corpus (one counting pass — cheap next to
+        re-fetching and re-splitting everything from ChromaDB). Re-uploaded chunk ids
+        (upserts) fall back to a full rebuild to avoid duplicates.
+        """
+        if collection_name not in self._bm25_indexes:
+            self._rebuild_bm25_index(collection_name)
+            return
+
+        _, corpus_data = self._bm25_indexes[collection_name]
+        existing_ids = {d["chunk_id"] for d in corpus_data}
+        if any(c.chunk_id in existing_ids for c in chunks):
+            self._rebuild_bm25_index(collection_name)
+            return
+
+        tokenized_corpus = self._bm25_tokenized[collection_name]
+        vocab = self._bm25_vocab[collection_name]
+        store = self._chunk_store.setdefault(collection_name, {})
+        for c in chunks:
+            entry = {
+                "content": c.content,
+                "chunk_id": c.chunk_id,
+                "filename": c.metadata.get("filename", "Unknown"),
+                "page": c.metadata.get("page", None),
+            }
+            corpus_data.append(entry)
+            store[c.chunk_id] = entry
+            tokenized_corpus.append(self._encode_tokens(vocab, c.content, grow=True))
+
+        bm25 = _SparseBM25(tokenized_corpus, len(vocab))
+        self._bm25_indexes[collection_name] = (bm25, corpus_data)
+        self._build_bm25_subindexes(
+            collection_name,
+            filenames={c.metadata.get("filename", "Unknown") for c in chunks},
+        )
+        self._save_bm25_snapshot(collection_name)
+        logger.info(
+            f"BM25 index extended for '{collection_name}' "
+            f"(+{len(chunks)} → {len(corpus_data)} docs)"
         )
-        return fused_list
 
     def _rebuild_bm25_index(self, collection_name: str):
-        """Rebuild the BM25 index from ChromaDB data."""
+        """Rebuild the BM25 index, preferring the on-disk snapshot."""
         collection = self.get_or_create_collection(collection_name)
 
-        if collection.count() == 0:
+        count = collection.count()
+        if count == 0:
+            return
+
+        if self._load_bm25_snapshot(collection_name, count):
             return
 
         # Get all documents from ChromaDB
@@ -260,6 +708,7 @@ class RetrievalService:
 
         corpus_data = []
         tokenized_corpus = []
+        vocab: dict[str, int] = {}
 
         for i, doc_text in enumerate(all_data["documents"]):
             metadata = all_data["metadatas"][i] if all_data["metadatas"] else {}
@@ -269,10 +718,15 @@ class RetrievalService:
                 "filename": metadata.get("filename", "Unknown"),
                 "page": metadata.get("page", None),
             })
-            tokenized_corpus.append(doc_text.lower().split())
+            tokenized_corpus.append(self._encode_tokens(vocab, doc_text, grow=True))
 
-        bm25 = BM25Okapi(tokenized_corpus)
+        bm25 = _SparseBM25(tokenized_corpus, len(vocab))
         self._bm25_indexes[collection_name] = (bm25, corpus_data)
+        self._bm25_tokenized[collection_name] = tokenized_corpus
+        self._bm25_vocab[collection_name] = vocab
+        self._chunk_store[collection_name] = {d["chunk_id"]: d for d in corpus_data}
+        self._build_bm25_subindexes(collection_name)
+        self._save_bm25_snapshot(collection_name)
         logger.info(f"BM25 index rebuilt for '{collection_name}' ({len(corpus_data)} docs)")
 
     def get_collection_stats(self, collection_name: str) -> dict:
@@ -287,8 +741,16 @@ class RetrievalService:
         """Delete a collection."""
         try:
             self.chroma_client.delete_collection(collection_name)
-            if collection_name in self._bm25_indexes:
-                del self._bm25_indexes[collection_name]
+            self._bm25_indexes.pop(collection_name, None)
+            self._bm25_tokenized.pop(collection_name, None)
+            self._bm25_vocab.pop(collection_name, None)
+            self._bm25_by_file.pop(collection_name, None)
+            self._chunk_store.pop(collection_name, None)
+            self._dense_index.pop(collection_name, None)
+            self._bm25_cache_path(collection_name).unlink(missing_ok=True)
+            self._collection_versions[collection_name] = (
+                self._collection_versions.get(collection_name, 0) + 1
+            )
             logger.info(f"Deleted collection: {collection_name}")
         except Exception as e:
             logger.error(f"Error deleting collection {collection_name}: {e}")